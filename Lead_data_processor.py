@@ -1,45 +1,193 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import datetime
 import os
 import io
 import zipfile
+import gc
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+CHUNK_SIZE = 250_000
+# pandas' default read_csv missing-value markers, shared by every CSV reader
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+# Bounds for every st.cache_data cache, which is shared by all sessions of the server process
+CACHE_MAX_ENTRIES = 8
+CACHE_TTL = 3600
+
+def _columns_of(file):
+    """Returns the header of an uploaded CSV without parsing its rows."""
+    header = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+    return set(header)
+
+def _read_csv_text(file, **kwargs):
+    """Reads an uploaded CSV with every cell kept as text, so values are written back exactly as uploaded."""
+    return pd.read_csv(file, dtype=str, keep_default_na=False, na_values=NA_VALUES, **kwargs)
+
+def _parallel_map(func, items):
+    """Applies func to each item on a thread pool, returning results in input order."""
+    # pandas/pyarrow release the GIL for much of their parsing and hashing, so items overlap.
+    # Workers get the script run context so their st.* messages still reach the page, and each
+    # item runs in a copy of the caller's contextvars so st.cache_data records those messages
+    # for replay on cache hits. A Context can only be entered by one thread at a time, hence one per item.
+    ctx = get_script_run_ctx()
+    contexts = [contextvars.copy_context() for _ in items]
+    max_workers = min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        return list(ex.map(lambda context, item: context.run(func, item), contexts, items))
+
+def _read_any(file, usecols=None):
+    """Reads an uploaded CSV or Excel file, optionally keeping only the `usecols` columns it has."""
+    if file.name.endswith('.csv'):
+        if usecols is not None:
+            header = _columns_of(file)
+            usecols = [c for c in usecols if c in header]
+        # Same text policy as the combine paths; pyarrow's parser would rewrite numbers and timestamps
+        df = _read_csv_text(file, usecols=usecols)
+    elif file.name.endswith(('.xls', '.xlsx')):
+        if usecols is not None:
+            wanted = set(usecols)
+            usecols = lambda c: c in wanted
+        try:
+            df = pd.read_excel(file, engine='calamine', usecols=usecols)
+        except ImportError:
+            # python-calamine not installed; let pandas pick its default engine
+            file.seek(0)
+            df = pd.read_excel(file, usecols=usecols)
+    else:
+        st.error(f"Unsupported file type: {file.name}")
+        return None
+    return df
+
+def _as_upload(name, data):
+    """Wraps stored upload bytes in a named file-like object, as Streamlit's UploadedFile is."""
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def _parse_file(name, data):
+    """Parses an upload's bytes, cached on name and content so reruns reuse the DataFrame."""
+    return _read_any(_as_upload(name, data))
+
+def _dedup_mask(df):
+    """Marks the first occurrence of each lead by 'full_name' and/or 'linkedin' as True."""
+    cols = [c for c in ('full_name', 'linkedin') if c in df.columns]
+    if not cols:
+        st.error("Neither 'full_name' nor 'linkedin' columns found. Cannot remove duplicates.")
+        return None
+    return ~df.duplicated(subset=cols, keep='first').to_numpy()
+
+def _dedup(df):
+    """Removes duplicate leads by 'full_name' and/or 'linkedin', keeping the first occurrence."""
+    keep = _dedup_mask(df)
+    if keep is None:
+        return None
+    return df.loc[keep].reset_index(drop=True)
+
+def _key_hashes(df, cols):
+    """Hashes each row's key columns to a uint64; missing values hash alike whatever the dtype."""
+    keys = df[list(cols)]
+    # Float/null/object columns (e.g. an all-blank 'linkedin') would hash NaN differently from
+    # string columns, so view them as objects with None for every missing value
+    loose = [c for c in cols if keys[c].dtype == object or not pd.api.types.is_string_dtype(keys[c])]
+    if loose:
+        keys = keys.astype({c: object for c in loose})
+        keys[loose] = keys[loose].where(keys[loose].notna(), None)
+    # Lead keys are mostly unique, so factorizing them first (categorize=True) only adds work
+    return pd.util.hash_pandas_object(keys, index=False, categorize=False).to_numpy()
+
+def _combine_csvs_lazily(files, cols):
+    """Concatenates and deduplicates CSV uploads in a single streaming polars query."""
+    # Columns are read as text, like the pandas chunked path, so both give identical output
+    frames = [pl.scan_csv(io.BytesIO(file.getvalue()), infer_schema=False, null_values=NA_VALUES) for file in files]
+    combined = pl.concat(frames, how='diagonal').unique(subset=cols, keep='first', maintain_order=True)
+    return combined.collect(engine='streaming').to_pandas()
 
 def process_and_combine(uploaded_files):
     """Processes uploaded files, combines data, and removes duplicates."""
-    combined_data = pd.DataFrame()
+    # Collect headers first so every row is keyed on the same dedup columns
+    sources = []
+    columns = set()
     for file in uploaded_files:
         try:
             if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.name.endswith(('.xls', '.xlsx')):
-                df = pd.read_excel(file)
+                df = None
+                header = _columns_of(file)
             else:
-                st.error(f"Unsupported file type: {file.name}")
+                df = _parse_file(file.name, file.getvalue())
+                if df is None:
+                    continue
+                header = set(df.columns)
+            # Files without any key column can't be deduplicated; CSVs are rejected from their
+            # header alone, while Excel files have already been parsed (and cached) by this point
+            if not header & {'full_name', 'linkedin'}:
+                st.warning(f"Skipping {file.name}: neither 'full_name' nor 'linkedin' columns found.")
                 continue
-            combined_data = pd.concat([combined_data, df], ignore_index=True)
+            sources.append((file, df))
+            columns |= header
         except Exception as e:
             st.error(f"Error processing {file.name}: {e}")
             return None
-    if combined_data.empty:
+    if not sources:
         st.warning("No data to process.")
         return None
+    cols = [c for c in ('full_name', 'linkedin') if c in columns]
 
-    # Deduplication logic
-    if 'full_name' in combined_data.columns and 'linkedin' in combined_data.columns:
-        combined_data = combined_data.drop_duplicates(subset=['full_name', 'linkedin'], keep='first')
-    elif 'full_name' in combined_data.columns:
-        combined_data = combined_data.drop_duplicates(subset=['full_name'], keep='first')
-    elif 'linkedin' in combined_data.columns:
-        combined_data = combined_data.drop_duplicates(subset=['linkedin'], keep='first')
-    else:
-        st.error("Neither 'full_name' nor 'linkedin' columns found. Cannot remove duplicates.")
+    combined_data = None
+    if pl is not None and pa is not None and all(df is None for _, df in sources):
+        try:
+            combined_data = _combine_csvs_lazily([file for file, _ in sources], cols)
+        except (pl.exceptions.PolarsError, pa.ArrowException):
+            pass  # fall back to the pandas chunked reader below
+
+    if combined_data is None:
+        # Deduplicate chunk by chunk so only unique rows are ever held in memory
+        seen = np.empty(0, dtype=np.uint64)  # sorted hashes of every key kept so far
+        frames = []
+        for file, df in sources:
+            try:
+                chunks = [df] if df is not None else _read_csv_text(file, chunksize=CHUNK_SIZE)
+                for chunk in chunks:
+                    keys = _key_hashes(chunk.reindex(columns=cols), cols)
+                    # First occurrence within the chunk, and not already kept from an earlier chunk
+                    pos = np.searchsorted(seen, keys)
+                    in_seen = seen[np.minimum(pos, len(seen) - 1)] == keys if len(seen) else np.zeros(len(keys), dtype=bool)
+                    first = ~pd.Series(keys).duplicated().to_numpy() & ~in_seen
+                    new_keys = np.sort(keys[first])
+                    seen = np.insert(seen, np.searchsorted(seen, new_keys), new_keys)
+                    frames.append(chunk.loc[first])
+            except Exception as e:
+                st.error(f"Error processing {file.name}: {e}")
+                return None
+        # A single concat already sizes each output column once from the total row count
+        combined_data = pd.concat(frames, ignore_index=True)
+    if combined_data.empty:
+        st.warning("No data to process.")
         return None
     return combined_data
 
+def _df_to_csv_bytes(df):
+    """Encodes a DataFrame as UTF-8 CSV bytes."""
+    return df.to_csv(index=False).encode('utf-8')
+
 def download_csv(df, filename):
     """Generates a download link for a DataFrame as a CSV."""
-    csv = df.to_csv(index=False).encode('utf-8')
+    csv = _df_to_csv_bytes(df)
     st.download_button(
         label="Download Combined Leads",
         data=csv,
@@ -50,32 +198,18 @@ def download_csv(df, filename):
 def process_and_clean_single(uploaded_file):
     """Processes a single file and removes duplicates."""
     try:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(uploaded_file)
-        else:
-            st.error(f"Unsupported file type: {uploaded_file.name}")
+        df = _parse_file(uploaded_file.name, uploaded_file.getvalue())
+        if df is None:
             return None
 
-        # Deduplication logic
-        if 'full_name' in df.columns and 'linkedin' in df.columns:
-            df = df.drop_duplicates(subset=['full_name', 'linkedin'], keep='first')
-        elif 'full_name' in df.columns:
-            df = df.drop_duplicates(subset=['full_name'], keep='first')
-        elif 'linkedin' in df.columns:
-            df = df.drop_duplicates(subset=['linkedin'], keep='first')
-        else:
-            st.error("Neither 'full_name' nor 'linkedin' columns found. Cannot remove duplicates.")
-            return None
-        return df
+        return _dedup(df)
     except Exception as e:
         st.error(f"Error processing {uploaded_file.name}: {e}")
         return None
 
 def download_cleaned_csv(df, filename):
     """Generates a download link for a cleaned DataFrame as a CSV."""
-    csv = df.to_csv(index=False).encode('utf-8')
+    csv = _df_to_csv_bytes(df)
     st.download_button(
         label=f"Download {filename}",
         data=csv,
@@ -83,65 +217,97 @@ def download_cleaned_csv(df, filename):
         mime='text/csv',
     )
 
-def check_and_clean(reference_df, files_to_check):
-    """Checks files against reference, removes duplicates within files, and removes reference duplicates."""
-    cleaned_files = []
-    for file in files_to_check:
-        try:
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.name.endswith(('.xls', '.xlsx')):
-                df = pd.read_excel(file)
-            else:
-                st.error(f"Unsupported file type: {file.name}")
-                continue
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def _zip_bytes(files):
+    """Packs a {filename: bytes} mapping into a ZIP archive; level 1 deflate shrinks CSV text cheaply."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+        for filename, data in files.items():
+            zip_file.writestr(filename, data)
+    return zip_buffer.getvalue()
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def _build_ref_keys(name, data):
+    """Hashes the reference keys for each key combination it supports into a sorted unique array."""
+    # Cached on the upload bytes: Streamlit only samples large DataFrames when hashing them
+    # Only the key columns of the reference are ever consulted
+    reference_df = _read_any(_as_upload(name, data), usecols=['full_name', 'linkedin'])
+    if reference_df is None:
+        return None
+    ref_keys = {}
+    for cols in (('full_name', 'linkedin'), ('full_name',), ('linkedin',)):
+        if all(c in reference_df.columns for c in cols):
+            ref_keys[cols] = np.unique(_key_hashes(reference_df, cols))
+    return ref_keys
+
+def _shared_keys(ref_keys, columns):
+    """Returns the widest reference key combination fully present in `columns`, or None."""
+    return next((cols for cols in ref_keys if all(c in columns for c in cols)), None)
+
+def _check_file(file, ref_keys):
+    """Deduplicates one check file and drops rows whose keys appear in the reference."""
+    try:
+        # Reject CSVs that share no key columns with the reference before parsing their rows
+        if file.name.endswith('.csv') and _shared_keys(ref_keys, _columns_of(file)) is None:
+            st.warning(f"Skipping {file.name}: no key columns in common with the reference file.")
+            return None
 
-            # Deduplicate within the file first
-            if 'full_name' in df.columns and 'linkedin' in df.columns:
-                df = df.drop_duplicates(subset=['full_name', 'linkedin'], keep='first')
-            elif 'full_name' in df.columns:
-                df = df.drop_duplicates(subset=['full_name'], keep='first')
-            elif 'linkedin' in df.columns:
-                df = df.drop_duplicates(subset=['linkedin'], keep='first')
-            else:
-                st.error("Neither 'full_name' nor 'linkedin' columns found in check file.")
-                continue
+        df = _parse_file(file.name, file.getvalue())
+        if df is None:
+            return None
 
-            # Remove reference duplicates
-            if 'full_name' in reference_df.columns and 'linkedin' in reference_df.columns and 'full_name' in df.columns and 'linkedin' in df.columns:
-                df = df[~df.set_index(['full_name', 'linkedin']).index.isin(reference_df.set_index(['full_name', 'linkedin']).index)]
-            elif 'full_name' in reference_df.columns and 'full_name' in df.columns:
-                df = df[~df['full_name'].isin(reference_df['full_name'])]
-            elif 'linkedin' in reference_df.columns and 'linkedin' in df.columns:
-                df = df[~df['linkedin'].isin(reference_df['linkedin'])]
-            else:
-                st.error("Columns mismatch between reference and check files.")
-                continue
+        # Deduplicate within the file first
+        keep = _dedup_mask(df)
+        if keep is None:
+            return None
 
-            cleaned_files.append(df)
-        except Exception as e:
-            st.error(f"Error processing {file.name}: {e}")
-    return cleaned_files
+        # Remove reference duplicates by probing the row key hashes against the reference's
+        cols = _shared_keys(ref_keys, df.columns)
+        if cols is None:
+            st.error("Columns mismatch between reference and check files.")
+            return None
+        keep &= ~np.isin(_key_hashes(df, cols), ref_keys[cols])
+        # Both filters are applied in a single take of the original frame
+        return df.loc[keep].reset_index(drop=True)
+    except Exception as e:
+        st.error(f"Error processing {file.name}: {e}")
+        return None
+
+def check_and_clean(ref_keys, files_to_check):
+    """Checks files against reference keys, removes duplicates within files and reference duplicates; returns (name, df) pairs."""
+    results = _parallel_map(lambda file: _check_file(file, ref_keys), files_to_check)
+    return [(file.name, df) for file, df in zip(files_to_check, results) if df is not None]
 
 def inmail_and_invite_separator(uploaded_files):
     """Splits files by 'open' status (TRUE/FALSE) and provides download links."""
     split_files = {}
     for file in uploaded_files:
         try:
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.name.endswith(('.xls', '.xlsx')):
-                df = pd.read_excel(file)
-            else:
-                st.error(f"Unsupported file type: {file.name}")
+            df = _parse_file(file.name, file.getvalue())
+            if df is None:
                 continue
 
             if 'open' not in df.columns:
                 st.error(f"Column 'open' not found in {file.name}")
                 continue
 
-            true_df = df[df['open'] == True]
-            false_df = df[df['open'] == False]
+            open_col = df['open']
+            if pd.api.types.is_bool_dtype(open_col):
+                # One pass over the column; missing values land in neither split
+                is_true = open_col.fillna(False).to_numpy(dtype=bool)
+                is_false = ~is_true & open_col.notna().to_numpy()
+            elif pd.api.types.is_string_dtype(open_col):
+                # CSV cells arrive as text; read them the way pandas' parser would type them,
+                # so TRUE/true/1/1.0 are opened and FALSE/false/0/0.0 are not. Blanks go to neither split
+                number = pd.to_numeric(open_col, errors='coerce')
+                is_true = (open_col.isin(['True', 'TRUE', 'true']) | (number == 1)).to_numpy(dtype=bool)
+                is_false = (open_col.isin(['False', 'FALSE', 'false']) | (number == 0)).to_numpy(dtype=bool)
+            else:
+                # Nullable columns compare to NA on blanks; those rows go to neither split
+                is_true = (open_col == True).to_numpy(dtype=bool, na_value=False)
+                is_false = (open_col == False).to_numpy(dtype=bool, na_value=False)
+            true_df = df.iloc[is_true]
+            false_df = df.iloc[is_false]
 
             split_files[file.name] = {'TRUE': true_df, 'FALSE': false_df}
 
@@ -149,40 +315,73 @@ def inmail_and_invite_separator(uploaded_files):
             st.error(f"Error processing {file.name}: {e}")
     return split_files
 
+# Uploads are passed in as (name, bytes) pairs so Streamlit can hash them as cache keys.
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def _cached_process_and_combine(files):
+    return process_and_combine([_as_upload(name, data) for name, data in files])
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def _cached_process_and_clean_single(name, data):
+    return process_and_clean_single(_as_upload(name, data))
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def _cached_check_and_clean(reference, files):
+    # The reference is hashed into its probe table once; each check file only probes it
+    ref_keys = _build_ref_keys(*reference)
+    if ref_keys is None:
+        return None
+    return check_and_clean(ref_keys, [_as_upload(name, data) for name, data in files])
+
+def _release_download_data():
+    """Drops the split CSV bytes kept in session state once they can no longer be downloaded."""
+    if st.session_state.pop('download_data', None) is not None:
+        gc.collect()
+
 def main():
     st.title("Lead Data Cleaning and Processing")
 
     program_choice = st.radio("Select Program:", ("Combine and Clean", "Clean Single Files", "Check Against Reference", "Inmail and Invite Separator"))
 
+    # Split outputs only live as long as the separator has uploads to serve them from
+    if program_choice != "Inmail and Invite Separator":
+        _release_download_data()
+
     if program_choice == "Combine and Clean":
-        uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="combine_upload")
+        with st.form("combine_form"):
+            uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="combine_upload")
+            submit = st.form_submit_button("Start Processing (Combine)")
         if uploaded_files:
             st.subheader("Uploaded Files:")
             for file in uploaded_files:
                 st.write(file.name)
-            if st.button("Start Processing (Combine)"):
-                combined_data = process_and_combine(uploaded_files)
+            if submit:
+                files = [(f.name, f.getvalue()) for f in uploaded_files]
+                combined_data = _cached_process_and_combine(files)
                 if combined_data is not None and not combined_data.empty:
                     now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
                     filename = f"COMBINED_CLEAN_LEADS_{now}.csv"
                     download_csv(combined_data, filename)
 
     elif program_choice == "Clean Single Files":
-        uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="clean_single_upload")
+        with st.form("clean_single_form"):
+            uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="clean_single_upload")
+            submit = st.form_submit_button("Start Processing (Clean Single)")
         if uploaded_files:
             st.subheader("Uploaded Files:")
             for file in uploaded_files:
                 st.write(file.name)
-            if st.button("Start Processing (Clean Single)"):
-                for file in uploaded_files:
-                    cleaned_data = process_and_clean_single(file)
+            if submit:
+                results = _parallel_map(lambda file: _cached_process_and_clean_single(file.name, file.getvalue()), uploaded_files)
+                for file, cleaned_data in zip(uploaded_files, results):
                     if cleaned_data is not None and not cleaned_data.empty:
                         filename = f"{os.path.splitext(file.name)[0]}_CLEAN.csv"
                         download_cleaned_csv(cleaned_data, filename)
 
     elif program_choice == "Check Against Reference":
-        reference_file = st.file_uploader("Upload Reference CSV or Excel file", type=['csv', 'xls', 'xlsx'], key="reference_upload")
-        files_to_check = st.file_uploader("Upload CSV or Excel files to check", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="check_files_upload")
+        with st.form("check_form"):
+            reference_file = st.file_uploader("Upload Reference CSV or Excel file", type=['csv', 'xls', 'xlsx'], key="reference_upload")
+            files_to_check = st.file_uploader("Upload CSV or Excel files to check", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="check_files_upload")
+            submit = st.form_submit_button("Start Processing (Check Against Reference)")
 
         if reference_file and files_to_check:
             st.subheader("Reference File:")
@@ -191,31 +390,25 @@ def main():
             for file in files_to_check:
                 st.write(file.name)
 
-            if st.button("Start Processing (Check Against Reference)"):
+            if submit:
                 try:
-                    if reference_file.name.endswith('.csv'):
-                        reference_df = pd.read_csv(reference_file)
-                    elif reference_file.name.endswith(('.xls', '.xlsx')):
-                        reference_df = pd.read_excel(reference_file)
-                    else:
-                        st.error(f"Unsupported file type for reference file: {reference_file.name}")
+                    reference = (reference_file.name, reference_file.getvalue())
+                    files = [(f.name, f.getvalue()) for f in files_to_check]
+                    cleaned_files = _cached_check_and_clean(reference, files)
+                    if cleaned_files is None:
                         return
-
-                    cleaned_files = check_and_clean(reference_df, files_to_check)
                     if cleaned_files:
                         now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
                         zip_filename = f"CHECKED_CLEANED_LEADS_{now}.zip"
-                        zip_buffer = io.BytesIO()
-                        with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-                            for i, cleaned_df in enumerate(cleaned_files):
-                                if not cleaned_df.empty:  # Only create file if not empty
-                                    filename = f"{os.path.splitext(files_to_check[i].name)[0]}_CHECKED_CLEANED.csv"
-                                    csv_data = cleaned_df.to_csv(index=False).encode('utf-8')
-                                    zip_file.writestr(filename, csv_data)
-                        zip_buffer.seek(0)
+                        # Encode every CSV first, then hand the bytes to the ZIP writer in one pass
+                        csv_files = {
+                            f"{os.path.splitext(name)[0]}_CHECKED_CLEANED.csv": _df_to_csv_bytes(cleaned_df)
+                            for name, cleaned_df in cleaned_files
+                            if not cleaned_df.empty  # Only create file if not empty
+                        }
                         st.download_button(
                             label="Download Checked and Cleaned Files (ZIP)",
-                            data=zip_buffer,
+                            data=_zip_bytes(csv_files),
                             file_name=zip_filename,
                             mime='application/zip',
                         )
@@ -225,25 +418,27 @@ def main():
                     st.error(f"An error occurred during processing: {e}")
 
     elif program_choice == "Inmail and Invite Separator":
-        uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="split_upload")
+        with st.form("split_form"):
+            uploaded_files = st.file_uploader("Upload CSV or Excel files", type=['csv', 'xls', 'xlsx'], accept_multiple_files=True, key="split_upload")
+            submit = st.form_submit_button("Split and Generate Download Buttons")
 
         if uploaded_files:
             if "download_data" not in st.session_state:
                 st.session_state.download_data = {}
 
-            if st.button("Split and Generate Download Buttons"):
+            if submit:
                 split_data = inmail_and_invite_separator(uploaded_files)
                 st.session_state.download_data = {}  # Clear previous data
 
                 for filename, status_dfs in split_data.items():
                     if not status_dfs['TRUE'].empty:
                         true_filename = f"{os.path.splitext(filename)[0]}_Inmail.csv"
-                        true_csv = status_dfs['TRUE'].to_csv(index=False).encode('utf-8')
+                        true_csv = _df_to_csv_bytes(status_dfs['TRUE'])
                         st.session_state.download_data[true_filename] = true_csv
 
                     if not status_dfs['FALSE'].empty:
                         false_filename = f"{os.path.splitext(filename)[0]}_Invite.csv"
-                        false_csv = status_dfs['FALSE'].to_csv(index=False).encode('utf-8')
+                        false_csv = _df_to_csv_bytes(status_dfs['FALSE'])
                         st.session_state.download_data[false_filename] = false_csv
 
             for filename, data in st.session_state.download_data.items():
@@ -256,21 +451,20 @@ def main():
 
             if st.session_state.download_data:
                 if st.button("Download All as ZIP"):
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-                        for filename, data in st.session_state.download_data.items():
-                            zip_file.writestr(filename, data)
-
-                    zip_buffer.seek(0)
+                    # The CSVs are already encoded bytes; only the archive is built here
                     st.download_button(
                         label="Download All Files.zip",
-                        data=zip_buffer,
+                        data=_zip_bytes(st.session_state.download_data),
                         file_name="AllFiles.zip",
                         mime='application/zip',
                     )
+        else:
+            _release_download_data()
 
     if st.button("Reset"):
-        st.experimental_rerun()
+        # Dropping all session state also clears the uploaders and the buffered file bytes
+        st.session_state.clear()
+        st.rerun()
 
 if __name__ == "__main__":
     main()
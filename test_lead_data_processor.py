@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+import Lead_data_processor as ldp
+
+# Cells that a type-inferring reader would rewrite on the way back out
+SAMPLE_CSV = (
+    b'full_name,linkedin,open,score,zip,seen\n'
+    b'Ann,in/ann,TRUE,1.50,007,2024-01-05T10:00:00Z\n'
+    b'Bob,,false,2,010,2024-01-05 10:00\n'
+    b'Ann,in/ann,TRUE,1.50,007,2024-01-05T10:00:00Z\n'
+    b'Cy,in/cy,,NA,,\n'
+)
+
+
+def _upload(name, data):
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+
+@pytest.mark.parametrize('use_polars', [True, False])
+def test_combine_and_clean_single_write_identical_bytes(monkeypatch, use_polars):
+    if not use_polars:
+        monkeypatch.setattr(ldp, 'pl', None)
+    elif ldp.pl is None or ldp.pa is None:
+        pytest.skip('polars/pyarrow not installed')
+    combined = ldp.process_and_combine([_upload('leads.csv', SAMPLE_CSV)])
+    cleaned = ldp.process_and_clean_single(_upload('leads.csv', SAMPLE_CSV))
+    assert ldp._df_to_csv_bytes(combined) == ldp._df_to_csv_bytes(cleaned)
+    assert ldp._df_to_csv_bytes(cleaned) == (
+        b'full_name,linkedin,open,score,zip,seen\n'
+        b'Ann,in/ann,TRUE,1.50,007,2024-01-05T10:00:00Z\n'
+        b'Bob,,false,2,010,2024-01-05 10:00\n'
+        b'Cy,in/cy,,,,\n'
+    )
+
+
+def test_separator_reads_text_open_values():
+    split = ldp.inmail_and_invite_separator([_upload('leads.csv', SAMPLE_CSV)])['leads.csv']
+    assert list(split['TRUE']['full_name']) == ['Ann', 'Ann']
+    assert list(split['FALSE']['full_name']) == ['Bob']